@@ -1,21 +1,103 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .autocomplete import autocomplete_index
 from .models import BlogPost, Category, Comment
+from .purge import schedule_purge
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the planner's row estimate instead of COUNT(*) for unfiltered changelists
+    on PostgreSQL; filtered lists and other databases still count exactly.
+    """
+    estimate_threshold = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.estimate_threshold:
+                return int(row[0])
+        return super().count
+
+
+class IndexedSearchMixin:
+    """
+    Searches with case-sensitive `exact`/`startswith` lookups instead of the default
+    `iexact`/`icontains`, which wrap columns in UPPER() and defeat their indexes. On
+    PostgreSQL these hit the unique btree indexes and the varchar_pattern_ops `_like`
+    indexes Django creates for indexed CharFields; `search_fields` lists the lookups.
+    """
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        query = Q()
+        for lookup in self.get_search_fields(request):
+            query |= Q(**{lookup: search_term})
+        return queryset.filter(query), False
+
 
 @admin.register(BlogPost)
-class BlogPostAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'status', 'created_at')
-    list_filter = ('status', 'created_at', 'author', 'category')
-    search_fields = ('title', 'content')
+class BlogPostAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('title', 'author', 'category', 'status', 'created_at')
+    list_filter = ('status', 'created_at', 'category', ('deleted_at', admin.EmptyFieldListFilter))
+    list_select_related = ('author', 'category')
+    # Title prefix, exact slug or exact author username (also how to filter by author)
+    search_fields = ('title__startswith', 'slug', 'author__username')
+    autocomplete_fields = ('author', 'category')
     prepopulated_fields = {'slug': ('title',)}
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Deleting from the admin soft-deletes like the API does; comments and likes are purged
+    # in chunks afterwards instead of cascading in one transaction (see blog/purge.py)
+    def get_deleted_objects(self, objs, request):
+        posts = list(objs)
+        return [str(post) for post in posts], {self.opts.verbose_name_plural: len(posts)}, set(), []
+
+    def delete_model(self, request, obj):
+        if obj.deleted_at is None:
+            obj.soft_delete()
+        schedule_purge([obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        post_ids = list(queryset.values_list('pk', flat=True))
+        visible = BlogPost.objects.visible().filter(pk__in=post_ids)
+        category_ids = set(visible.exclude(category__isnull=True).values_list('category_id', flat=True).distinct())
+        visible.update(deleted_at=timezone.now())
+        # update() skips the post_save signal, so refresh the category aggregates and autocomplete here
+        if category_ids:
+            Category.refresh_post_stats(category_ids)
+        transaction.on_commit(lambda: autocomplete_index.refresh_posts(post_ids))
+        schedule_purge(post_ids)
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'created_at')
+    list_display = ('name', 'published_post_count', 'latest_post_at', 'created_at')
     search_fields = ('name',)
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('post', 'author', 'created_at')
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('id', 'post', 'author', 'created_at')
     list_filter = ('created_at',)
-    search_fields = ('content',)
+    # Exact post slug or author username (also how to filter by post or author)
+    search_fields = ('post__slug', 'author__username')
+    autocomplete_fields = ('post', 'author', 'parent')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
+    def get_queryset(self, request):
+        # Comment.__str__ reads the author and post, including in autocomplete results
+        return super().get_queryset(request).select_related('post', 'author')
@@ -0,0 +1,292 @@
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from itertools import chain
+
+from django.core.cache import cache
+from django.db import connection
+
+from .models import BlogPost, Category
+
+
+MAX_KEYS_PER_ENTRY = 8  # Word starts indexed per title/name, so "dja" also finds "Intro to Django"
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def index_keys(text):
+    words = normalize(text).split()
+    return tuple(dict.fromkeys(' '.join(words[i:]) for i in range(min(len(words), MAX_KEYS_PER_ENTRY))))
+
+
+class PrefixIndex:
+    """
+    Sorted array of (key, kind, pk) tuples searched with bisect.
+
+    Each entry is indexed under its normalized text and under the suffixes starting at
+    its next few words. Lookups are a binary search plus a scan over the matches.
+    """
+    def __init__(self):
+        self._keys = []
+        self._entries = {}  # (kind, pk) -> (keys, payload)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def build(cls, entries):
+        """
+        Build from (kind, pk, text, payload) tuples, sorting once instead of inserting one by one.
+        """
+        index = cls()
+        for kind, pk, text, payload in entries:
+            keys = index_keys(text)
+            index._keys.extend((key, kind, pk) for key in keys)
+            index._entries[(kind, pk)] = (keys, payload)
+        index._keys.sort()
+        return index
+
+    def add(self, kind, pk, text, payload):
+        self.remove(kind, pk)
+        keys = index_keys(text)
+        for key in keys:
+            insort(self._keys, (key, kind, pk))
+        self._entries[(kind, pk)] = (keys, payload)
+
+    def remove(self, kind, pk):
+        entry = self._entries.pop((kind, pk), None)
+        if entry is None:
+            return
+        for key in entry[0]:
+            position = bisect_left(self._keys, (key, kind, pk))
+            if position < len(self._keys) and self._keys[position] == (key, kind, pk):
+                del self._keys[position]
+
+    def search(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and len(results) < limit:
+            key, kind, pk = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            if (kind, pk) not in seen:
+                seen.add((kind, pk))
+                results.append(self._entries[(kind, pk)][1])
+            position += 1
+        return results
+
+    def memory_footprint(self):
+        """
+        Approximate bytes held by the index: containers, key tuples, strings and payloads.
+        """
+        total = sys.getsizeof(self._keys) + sys.getsizeof(self._entries)
+        for key, kind, pk in self._keys:
+            total += sys.getsizeof((key, kind, pk)) + sys.getsizeof(key)
+        for (kind, pk), (keys, payload) in self._entries.items():
+            total += sys.getsizeof((kind, pk)) + sys.getsizeof(pk) + sys.getsizeof(keys) + sys.getsizeof(payload)
+            total += sum(sys.getsizeof(value) for value in payload.values())
+        return total
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'keys': len(self._keys),
+            'bytes': self.memory_footprint(),
+        }
+
+
+def post_payload(pk, title, slug):
+    return {'type': 'post', 'id': pk, 'title': title, 'slug': slug}
+
+
+def category_payload(pk, name):
+    return {'type': 'category', 'id': pk, 'name': name}
+
+
+# Changes are (kind, pk, text, payload) tuples; text and payload are None for removals
+def removal(kind, pk):
+    return (kind, pk, None, None)
+
+
+def post_change(post):
+    if post.status == 'published' and post.deleted_at is None:
+        return ('post', post.pk, post.title, post_payload(post.pk, post.title, post.slug))
+    return removal('post', post.pk)
+
+
+def category_change(category):
+    return ('category', category.pk, category.name, category_payload(category.pk, category.name))
+
+
+class AutocompleteIndex:
+    """
+    Per-process prefix index over published post titles and category names.
+
+    Built on first use, then kept current with deltas: each change is applied locally
+    and appended to a change log in the shared cache, and other processes replay the
+    entries they have not seen (checked at most once per `poll_interval` seconds). A full
+    rebuild only happens when log entries are gone, and it runs in the background while
+    lookups keep using the current index. Cross-process freshness needs a shared cache
+    backend (REDIS_URL); with local memory each process only sees its own changes.
+    """
+    sequence_key = 'blog_autocomplete_sequence'
+    change_key = 'blog_autocomplete_change_%d'
+    change_timeout = 3600
+    poll_interval = 1.0
+    max_replay = 1000  # Further behind than this, a rebuild is cheaper than replaying
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Guards the index and the replay position; never held while querying
+        self._build_lock = threading.Lock()
+        self._index = None
+        self._applied = 0  # Last change log sequence number reflected in the index
+        self._polled_at = 0.0
+        self._gap = None  # (sequence, first seen) of a change log entry that has not shown up yet
+        self.build_seconds = None
+
+    def search(self, prefix, limit=10):
+        self._ensure_built()
+        self._poll()
+        with self._lock:
+            return self._index.search(prefix, limit)
+
+    def stats(self):
+        self._ensure_built()
+        with self._lock:
+            stats = self._index.stats()
+            stats['applied_changes'] = self._applied
+        stats['build_seconds'] = self.build_seconds
+        return stats
+
+    def publish(self, changes):
+        """
+        Apply `changes` here and append them to the shared change log for other processes.
+        """
+        changes = list(changes)
+        if not changes:
+            return
+        with self._lock:
+            if self._index is not None:
+                for change in changes:
+                    self._apply(change)
+        cache.add(self.sequence_key, 0, None)
+        try:
+            last = cache.incr(self.sequence_key, len(changes))
+        except ValueError:
+            # The counter was evicted between add() and incr(); readers will rebuild
+            cache.add(self.sequence_key, 0, None)
+            last = cache.incr(self.sequence_key, len(changes))
+        first = last - len(changes) + 1
+        cache.set_many(
+            {self.change_key % (first + offset): change for offset, change in enumerate(changes)},
+            self.change_timeout,
+        )
+
+    def refresh_posts(self, post_ids):
+        """
+        Re-read the given posts, for changes made with queryset.update() that send no signals.
+        """
+        post_ids = list(post_ids)
+        visible = {
+            pk: ('post', pk, title, post_payload(pk, title, slug))
+            for pk, title, slug in self._published_posts().filter(pk__in=post_ids).values_list('pk', 'title', 'slug')
+        }
+        self.publish(visible.get(pk, removal('post', pk)) for pk in post_ids)
+
+    def _apply(self, change):
+        kind, pk, text, payload = change
+        if text is None:
+            self._index.remove(kind, pk)
+        else:
+            self._index.add(kind, pk, text, payload)
+
+    def _published_posts(self):
+        return BlogPost.objects.visible().filter(status='published')
+
+    def _ensure_built(self):
+        if self._index is None:
+            with self._build_lock:
+                if self._index is None:
+                    self._build()
+
+    def _build(self):
+        """
+        Load every entry into a new index outside `_lock`, then swap it in.
+        """
+        started = time.perf_counter()
+        # Read the log position first: anything logged while we load is replayed afterwards
+        sequence = cache.get(self.sequence_key, 0)
+        posts = self._published_posts().values_list('pk', 'title', 'slug').iterator(chunk_size=5000)
+        categories = Category.objects.values_list('pk', 'name').iterator(chunk_size=5000)
+        index = PrefixIndex.build(chain(
+            (('post', pk, title, post_payload(pk, title, slug)) for pk, title, slug in posts),
+            (('category', pk, name, category_payload(pk, name)) for pk, name in categories),
+        ))
+        with self._lock:
+            self._index = index
+            self._applied = sequence
+            self._gap = None
+        self.build_seconds = time.perf_counter() - started
+
+    def _rebuild(self):
+        if not self._build_lock.acquire(blocking=False):
+            return  # Another thread is already rebuilding
+        try:
+            self._build()
+        finally:
+            self._build_lock.release()
+
+    def _rebuild_in_background(self):
+        try:
+            self._rebuild()
+        finally:
+            connection.close()
+
+    def _start_rebuild(self):
+        threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _poll(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._polled_at < self.poll_interval:
+                return
+            self._polled_at = now
+            applied = self._applied
+        latest = cache.get(self.sequence_key, 0)
+        if latest == applied:
+            return
+        if latest < applied or latest - applied > self.max_replay:
+            # The log was reset (cache flushed) or we are too far behind to replay it
+            self._start_rebuild()
+            return
+
+        sequences = range(applied + 1, latest + 1)
+        entries = cache.get_many([self.change_key % sequence for sequence in sequences])
+        with self._lock:
+            if self._applied != applied:
+                return  # A rebuild or another poll got here first
+            for sequence in sequences:
+                change = entries.get(self.change_key % sequence)
+                if change is None:
+                    break
+                self._apply(change)
+                self._applied = sequence
+            else:
+                self._gap = None
+                return
+            missing = self._applied + 1
+            if self._gap is None or self._gap[0] != missing:
+                # Possibly a writer between incr() and set_many(); give it until the next poll
+                self._gap = (missing, now)
+                return
+        self._start_rebuild()
+
+
+autocomplete_index = AutocompleteIndex()
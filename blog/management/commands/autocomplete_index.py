@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.autocomplete import AutocompleteIndex
+
+
+class Command(BaseCommand):
+    help = 'Build the autocomplete prefix index and report its size, build time and lookup speed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('prefixes', nargs='*', default=['a', 'th', 'dja', 'py'],
+                            help='Prefixes to time lookups with.')
+        parser.add_argument('--repeat', type=int, default=1000,
+                            help='Lookups per prefix.')
+
+    def handle(self, *args, **options):
+        index = AutocompleteIndex()
+        stats = index.stats()
+        self.stdout.write(f"Entries:     {stats['entries']}")
+        self.stdout.write(f"Index keys:  {stats['keys']}")
+        self.stdout.write(f"Memory:      {stats['bytes'] / 1024:.1f} KiB")
+        self.stdout.write(f"Build time:  {stats['build_seconds'] * 1000:.1f} ms")
+
+        repeat = max(options['repeat'], 1)
+        for prefix in options['prefixes']:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                results = index.search(prefix)
+            elapsed = (time.perf_counter() - started) / repeat
+            self.stdout.write(f"Lookup {prefix!r}: {elapsed * 1e6:.1f} µs ({len(results)} results)")
@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import BlogPost, Comment, COMMENT_MAX_DEPTH
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed deep and wide comment threads on a throwaway post and time thread retrieval. '
+        'Everything is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=20, help='Top-level comments.')
+        parser.add_argument('--depth', type=int, default=COMMENT_MAX_DEPTH, help='Levels of replies under each thread.')
+        parser.add_argument('--width', type=int, default=10, help='Replies per level; one of them continues deeper.')
+        parser.add_argument('--page-size', type=int, default=20, help='Threads per page when timing a page fetch.')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['depth'] <= COMMENT_MAX_DEPTH:
+            raise CommandError(f'--depth must be between 0 and {COMMENT_MAX_DEPTH}.')
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        author = User.objects.create(username='benchmark-comment-threads')
+        post = BlogPost.objects.create(title='Comment thread benchmark', content='', author=author)
+
+        started = time.perf_counter()
+        roots = Comment.objects.bulk_create(
+            Comment(post=post, author=author, content='root') for _ in range(options['threads'])
+        )
+        level = roots
+        for _ in range(options['depth']):
+            # Every comment on the current spine gets `width` replies; the first continues the spine
+            replies = Comment.objects.bulk_create(
+                Comment(post=post, author=author, parent=parent, content='reply')
+                for parent in level for _ in range(options['width'])
+            )
+            level = replies[::options['width']] if options['width'] else []
+        total = Comment.objects.filter(post=post).count()
+        self.stdout.write(f"Seeded {total} comments in {time.perf_counter() - started:.2f}s")
+
+        page_roots = list(Comment.objects.filter(post=post).roots().order_by('path')[:options['page_size']])
+        self.time('Thread page', lambda: Comment.objects.threads(page_roots).select_related('author'))
+        self.time('Thread page, depth <= 3', lambda: Comment.objects.threads(page_roots, max_depth=3))
+        self.time('Subtree of one thread', lambda: Comment.objects.subtree(roots[0]))
+        self.time('Subtree, 2 levels', lambda: Comment.objects.subtree(roots[0], max_depth=2))
+
+    def time(self, label, make_queryset):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            rows = len(list(make_queryset()))
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label}: {rows} comments, {len(queries)} queries, {elapsed * 1000:.1f} ms')
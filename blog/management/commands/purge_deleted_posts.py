@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import BlogPost
+from blog.purge import PURGE_CHUNK_SIZE, purge_post
+
+
+class Command(BaseCommand):
+    help = 'Purge soft-deleted posts, removing their comments and likes in chunks. Resumes interrupted purges.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE,
+                            help='Rows deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between chunks to leave room for other queries.')
+
+    def handle(self, *args, **options):
+        post_ids = list(BlogPost.objects.pending_purge().order_by('deleted_at').values_list('pk', flat=True))
+        for post_id in post_ids:
+            result = purge_post(post_id, chunk_size=options['chunk_size'], pause=options['pause'])
+            self.stdout.write(
+                f"Purged post {post_id}: {result['comments']} comments, {result['likes']} likes."
+            )
+        self.stdout.write(self.style.SUCCESS(f'Purged {len(post_ids)} posts.'))
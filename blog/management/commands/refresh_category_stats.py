@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Recompute published post counts and latest post timestamps for every category.'
+
+    def handle(self, *args, **options):
+        updated = Category.refresh_post_stats()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed stats for {updated} categories.'))
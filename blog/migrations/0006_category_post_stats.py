@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+def backfill_category_stats(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    for category in Category.objects.all():
+        published = BlogPost.objects.filter(category=category, status='published')
+        latest = published.order_by('-created_at').values_list('created_at', flat=True).first()
+        Category.objects.filter(pk=category.pk).update(
+            published_post_count=published.count(),
+            latest_post_at=latest,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_alter_blogpost_author_alter_comment_author'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='latest_post_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='published_post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['category', 'status', '-created_at'], name='blog_post_category_status_idx'),
+        ),
+        migrations.RunPython(backfill_category_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.4 on 2026-10-19 10:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def encode_path_step(value, step=8, alphabet='0123456789abcdefghijklmnopqrstuvwxyz'):
+    digits = []
+    while value:
+        value, remainder = divmod(value, len(alphabet))
+        digits.append(alphabet[remainder])
+    return ''.join(reversed(digits)).rjust(step, '0')
+
+
+def backfill_comment_paths(apps, schema_editor):
+    # Existing comments are flat, so every one becomes the root of its own thread
+    Comment = apps.get_model('blog', 'Comment')
+    batch = []
+    for comment in Comment.objects.only('pk').iterator(chunk_size=2000):
+        comment.path = encode_path_step(comment.pk)
+        batch.append(comment)
+        if len(batch) >= 2000:
+            Comment.objects.bulk_update(batch, ['path'])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_category_post_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='blog.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_comment_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='blog_comment_post_path_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_comment_threading'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_blogpost_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blogpost',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
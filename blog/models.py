@@ -1,15 +1,56 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.text import slugify
 
 # Category Model
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained from BlogPost changes (see blog/signals.py) so listings never aggregate per request
+    published_post_count = models.PositiveIntegerField(default=0, editable=False)
+    latest_post_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def refresh_post_stats(cls, category_ids=None):
+        """
+        Recompute published post counts and latest post timestamps in a single UPDATE.
+        Pass `category_ids` to limit the refresh to the categories that changed.
+
+        The category rows are locked (in pk order) before recounting. A concurrent writer
+        refreshing the same category therefore waits for this transaction to commit, and
+        its recount then sees our posts instead of overwriting them with a stale count.
+        """
+        published = BlogPost.objects.visible().filter(category=OuterRef('pk'), status='published')
+        categories = cls.objects.all()
+        if category_ids is not None:
+            categories = categories.filter(pk__in=category_ids)
+        with transaction.atomic():
+            list(categories.select_for_update().order_by('pk').values_list('pk', flat=True))
+            return categories.update(
+                published_post_count=Coalesce(
+                    Subquery(published.order_by().values('category').annotate(total=Count('pk')).values('total')),
+                    0,
+                ),
+                latest_post_at=Subquery(published.order_by('-created_at').values('created_at')[:1]),
+            )
+
+
+class BlogPostQuerySet(models.QuerySet):
+    def visible(self):
+        """
+        Posts that have not been soft-deleted.
+        """
+        return self.filter(deleted_at__isnull=True)
+
+    def pending_purge(self):
+        return self.filter(deleted_at__isnull=False)
+
 
 # BlogPost Model
 class BlogPost(models.Model):
@@ -18,7 +59,7 @@ class BlogPost(models.Model):
         ('published', 'Published'),
     ]
 
-    title = models.CharField(max_length=200)
+    title = models.CharField(max_length=200, db_index=True)
     slug = models.SlugField(unique=True, max_length=250, blank=True)
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE, null=True)
@@ -27,27 +68,167 @@ class BlogPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     liked_by = models.ManyToManyField(User, related_name='liked_posts', blank=True)
+    # Set when the post is deleted; its comments and likes are purged later in chunks (see blog/purge.py)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+
+    objects = BlogPostQuerySet.as_manager()
+
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
+    # Fields whose stored values are remembered so signal handlers can tell what a save changed
+    TRACKED_FIELDS = ('category_id', 'title', 'slug', 'status', 'deleted_at')
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
+        self._remember_loaded_values()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_values()
+        return instance
+
+    def _remember_loaded_values(self):
+        self._loaded_values = {name: self.__dict__.get(name) for name in self.TRACKED_FIELDS}
+
+    def loaded_value(self, name):
+        """
+        Value of a tracked field as last loaded or saved, or None for unsaved posts.
+        """
+        return getattr(self, '_loaded_values', {}).get(name)
+
+    def changed_fields(self):
+        """
+        Tracked fields that differ from the stored row; all of them for a post never saved.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return set(self.TRACKED_FIELDS)
+        return {name for name in self.TRACKED_FIELDS if self.__dict__.get(name) != loaded[name]}
 
     def __str__(self):
         return self.title
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['category', 'status', '-created_at'], name='blog_post_category_status_idx'),
+        ]
+
+
+# Comment threading
+# Each comment stores a materialized path: the fixed-width base-36 ids of its ancestors
+# followed by its own. Ordering by path yields threads depth-first with siblings in
+# creation order, and a subtree is a single prefix/range scan on (post, path).
+COMMENT_PATH_STEP = 8
+COMMENT_PATH_MAX_LENGTH = 255
+COMMENT_MAX_DEPTH = COMMENT_PATH_MAX_LENGTH // COMMENT_PATH_STEP - 1
+COMMENT_PATH_ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def encode_path_step(value):
+    digits = []
+    while value:
+        value, remainder = divmod(value, len(COMMENT_PATH_ALPHABET))
+        digits.append(COMMENT_PATH_ALPHABET[remainder])
+    return ''.join(reversed(digits)).rjust(COMMENT_PATH_STEP, '0')
+
+
+def path_upper_bound(path):
+    """
+    Largest possible path starting with `path`; descendants sort between the two.
+    """
+    return path.ljust(COMMENT_PATH_MAX_LENGTH, COMMENT_PATH_ALPHABET[-1])
+
+
+class CommentQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Insert comments and assign their paths in the same transaction.
+        Parents must already be saved, and the database must return the new primary keys
+        (PostgreSQL, SQLite 3.35+ and MariaDB 10.5+ do).
+        """
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            for comment in created:
+                if comment.pk is None:
+                    raise ValueError('Comment paths need the new primary keys, which this database does not return.')
+                comment.assign_path()
+            super().bulk_update(created, ['path', 'depth'], batch_size=kwargs.get('batch_size'))
+        return created
+
+    def roots(self):
+        return self.filter(parent__isnull=True)
+
+    def threads(self, roots, max_depth=None):
+        """
+        Every comment in the threads started by `roots` (consecutive top-level comments
+        of one post, ordered by path), fetched in one ordered range query.
+        """
+        roots = list(roots)
+        if not roots:
+            return self.none()
+        queryset = self.filter(
+            post_id=roots[0].post_id,
+            path__gte=roots[0].path,
+            path__lte=path_upper_bound(roots[-1].path),
+        )
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=max_depth)
+        return queryset.order_by('path')
+
+    def subtree(self, root, max_depth=None):
+        """
+        `root` and its replies down to `max_depth` levels below it, in thread order.
+        """
+        queryset = self.filter(
+            post_id=root.post_id,
+            path__gte=root.path,
+            path__lte=path_upper_bound(root.path),
+        )
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=root.depth + max_depth)
+        return queryset.order_by('path')
 
 
 # Comment Model
 class Comment(models.Model):
     post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name='comments')
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    path = models.CharField(max_length=COMMENT_PATH_MAX_LENGTH, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    def assign_path(self):
+        prefix = self.parent.path if self.parent_id else ''
+        self.path = prefix + encode_path_step(self.pk)
+        self.depth = self.parent.depth + 1 if self.parent_id else 0
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        # The path needs our own id, so it is written right after the insert. Both happen in
+        # one transaction so no other connection ever sees the row with an empty path.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            self.assign_path()
+            Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
     def __str__(self):
-        return f"Comment by {self.author.username} on {self.post.title}"
+        return f"Comment by {self.author.username if self.author else 'deleted user'} on {self.post.title}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'path'], name='blog_comment_post_path_idx'),
+        ]
 
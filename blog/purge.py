@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import BlogPost, Comment
+
+
+logger = logging.getLogger(__name__)
+
+PURGE_CHUNK_SIZE = 500
+
+
+def _delete_in_chunks(queryset, chunk_size, pause):
+    """
+    Delete rows of `queryset` (in its ordering) `chunk_size` at a time, each chunk in
+    its own short transaction so no lock is held for long.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            queryset.model.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def purge_post(post_id, chunk_size=PURGE_CHUNK_SIZE, pause=0):
+    """
+    Remove a soft-deleted post's comments and likes in bounded chunks, then the post itself.
+    Safe to call again after an interruption: it simply picks up what is left.
+    """
+    # Descending path order removes replies before the comments they answer
+    comments = Comment.objects.filter(post_id=post_id).order_by('-path')
+    likes = BlogPost.liked_by.through.objects.filter(blogpost_id=post_id).order_by('pk')
+
+    result = {
+        'comments': _delete_in_chunks(comments, chunk_size, pause),
+        'likes': _delete_in_chunks(likes, chunk_size, pause),
+    }
+    BlogPost.objects.pending_purge().filter(pk=post_id).delete()
+    return result
+
+
+def _purge_in_background(post_ids):
+    try:
+        for post_id in post_ids:
+            purge_post(post_id)
+    except Exception:
+        # The purge_deleted_posts command picks up anything left behind
+        logger.exception('Purging blog posts %s failed', post_ids)
+    finally:
+        connection.close()
+
+
+def schedule_purge(post_ids):
+    """
+    Start purging the given soft-deleted posts in a background thread once the
+    soft delete is committed.
+    """
+    if not getattr(settings, 'BLOG_PURGE_IN_BACKGROUND', True) or not post_ids:
+        return
+    post_ids = list(post_ids)
+    transaction.on_commit(
+        lambda: threading.Thread(target=_purge_in_background, args=(post_ids,), daemon=True).start()
+    )
@@ -16,10 +16,12 @@ class UserSerializer(serializers.ModelSerializer):
 class CategorySerializer(serializers.ModelSerializer):
     """
     Serializer for Category model.
+    Post stats are maintained aggregates and are read-only.
     """
     class Meta:
         model = Category
-        fields = [ 'name']
+        fields = ['id', 'name', 'published_post_count', 'latest_post_at']
+        read_only_fields = ['published_post_count', 'latest_post_at']
 
 
 # Comment Serializer
@@ -32,7 +34,39 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
+        fields = ['id', 'post', 'parent', 'depth', 'author', 'content', 'created_at', 'updated_at']
+
+
+# Comment Thread Serializer
+class CommentThreadSerializer(CommentSerializer):
+    """
+    Serializer for a comment with its replies nested underneath.
+    Replies are attached in memory by `build_comment_tree`, never queried per comment.
+    """
+    replies = serializers.SerializerMethodField()
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['replies']
+
+    def get_replies(self, obj):
+        return CommentThreadSerializer(getattr(obj, 'thread_replies', []), many=True, context=self.context).data
+
+
+def build_comment_tree(comments):
+    """
+    Link comments fetched in path order into trees and return the top-most ones.
+    """
+    by_id = {}
+    tops = []
+    for comment in comments:
+        comment.thread_replies = []
+        by_id[comment.pk] = comment
+        parent = by_id.get(comment.parent_id)
+        if parent is not None:
+            parent.thread_replies.append(comment)
+        else:
+            tops.append(comment)
+    return tops
 
 
 # BlogPost Serializer
@@ -65,6 +99,8 @@ class BlogPostSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if 'liked_by' in getattr(obj, '_prefetched_objects_cache', {}):
+                return any(user.id == request.user.id for user in obj.liked_by.all())
             return obj.liked_by.filter(id=request.user.id).exists()
         return False
 
@@ -79,6 +115,58 @@ class BlogPostSerializer(serializers.ModelSerializer):
             post.save()
         return post
     
+# Bulk Moderation Serializers
+BULK_MODERATION_MAX_ITEMS = 50000
+
+
+class PostModerationFilterSerializer(serializers.Serializer):
+    author = serializers.IntegerField(required=False)
+    category = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=BlogPost.STATUS_CHOICES, required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('Provide at least one filter.')
+        return attrs
+
+
+class CommentModerationFilterSerializer(serializers.Serializer):
+    post = serializers.IntegerField(required=False)
+    author = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('Provide at least one filter.')
+        return attrs
+
+
+class BulkModerationSerializer(serializers.Serializer):
+    """
+    Base serializer for bulk moderation: an action applied to either a list of ids or a filter.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=BULK_MODERATION_MAX_ITEMS,
+    )
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Provide either "ids" or "filter".')
+        return attrs
+
+
+class BulkPostModerationSerializer(BulkModerationSerializer):
+    action = serializers.ChoiceField(choices=['publish', 'unpublish', 'delete'])
+    filter = PostModerationFilterSerializer(required=False)
+
+
+class BulkCommentModerationSerializer(BulkModerationSerializer):
+    action = serializers.ChoiceField(choices=['delete'])
+    filter = CommentModerationFilterSerializer(required=False)
+
+
 class DeleteBlogPostSerializer(serializers.Serializer):
     confirm_delete = serializers.BooleanField(default=False, help_text="Check to confirm deletion.")
 
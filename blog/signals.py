@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .autocomplete import autocomplete_index, category_change, post_change, removal
+from .models import BlogPost, Category
+
+
+@receiver(post_save, sender=BlogPost)
+def refresh_category_stats_on_save(sender, instance, **kwargs):
+    """
+    Keep Category.published_post_count / latest_post_at in step with the post's
+    current and previously stored category.
+    """
+    if not instance.changed_fields() & {'category_id', 'status', 'deleted_at'}:
+        return
+    category_ids = {instance.category_id, instance.loaded_value('category_id')} - {None}
+    if category_ids:
+        Category.refresh_post_stats(category_ids)
+
+
+@receiver(post_delete, sender=BlogPost)
+def refresh_category_stats_on_delete(sender, instance, **kwargs):
+    if instance.category_id:
+        Category.refresh_post_stats([instance.category_id])
+
+
+@receiver(post_save, sender=BlogPost)
+def update_autocomplete_on_post_save(sender, instance, **kwargs):
+    # Content-only edits leave the index alone
+    if not instance.changed_fields() & {'title', 'slug', 'status', 'deleted_at'}:
+        return
+    change = post_change(instance)
+    transaction.on_commit(lambda: autocomplete_index.publish([change]))
+
+
+@receiver(post_delete, sender=BlogPost)
+def update_autocomplete_on_post_delete(sender, instance, **kwargs):
+    change = removal('post', instance.pk)
+    transaction.on_commit(lambda: autocomplete_index.publish([change]))
+
+
+@receiver(post_save, sender=Category)
+def update_autocomplete_on_category_save(sender, instance, **kwargs):
+    change = category_change(instance)
+    transaction.on_commit(lambda: autocomplete_index.publish([change]))
+
+
+@receiver(post_delete, sender=Category)
+def update_autocomplete_on_category_delete(sender, instance, **kwargs):
+    change = removal('category', instance.pk)
+    transaction.on_commit(lambda: autocomplete_index.publish([change]))
@@ -1,3 +1,814 @@
-from django.test import TestCase
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .autocomplete import AutocompleteIndex, PrefixIndex, post_payload
+from .models import BlogPost, Category, Comment, CommentQuerySet, COMMENT_MAX_DEPTH
+from .purge import purge_post
+from .views import BulkCommentModerationView, BulkPostModerationView
+from .throttling import DatabaseLatencyTracker, ReadThrottle, TokenBucketThrottle
+
+
+class BlogTestCase(TestCase):
+    """
+    Base test case: throttle buckets and cached responses must not leak between tests.
+    """
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+
+
+# Throttling Tests
+class TokenBucketThrottleTests(BlogTestCase):
+    def make_throttle(self, num_requests=3, duration=60):
+        throttle = ReadThrottle()
+        throttle.num_requests, throttle.duration = num_requests, duration
+        throttle.key = 'test_bucket'
+        self.clock = 1000.0
+        throttle.timer = lambda: self.clock
+        return throttle
+
+    def test_bucket_allows_burst_then_refills_at_rate(self):
+        throttle = self.make_throttle(num_requests=3, duration=60)
+        self.assertEqual([throttle.spend_token() for _ in range(4)], [True, True, True, False])
+        # One token comes back every 20 seconds
+        self.assertAlmostEqual(throttle.wait(), 20)
+
+        self.clock += 20
+        self.assertTrue(throttle.spend_token())
+        self.assertFalse(throttle.spend_token())
+
+    def test_bucket_never_exceeds_capacity(self):
+        throttle = self.make_throttle(num_requests=3, duration=60)
+        throttle.spend_token()
+        self.clock += 3600
+        self.assertEqual([throttle.spend_token() for _ in range(4)], [True, True, True, False])
+
+    def test_contended_bucket_is_refused_without_spending(self):
+        throttle = self.make_throttle()
+        throttle.lock_wait = 0
+        request = mock.Mock(user=mock.Mock(is_authenticated=True, pk=7), method='GET', query_params={})
+        lock_key = throttle.get_cache_key(request, None) + '_lock'
+        cache.add(lock_key, 1)
+
+        self.assertFalse(throttle.allow_request(request, None))
+        self.assertEqual(throttle.wait(), throttle.lock_timeout)
+
+        cache.delete(lock_key)
+        self.assertTrue(throttle.allow_request(request, None))
+
+
+@mock.patch.object(TokenBucketThrottle, 'THROTTLE_RATES', {
+    'read': '2/min', 'search': '1/min', 'write': '20/min', 'autocomplete': '600/min',
+})
+class ThrottleEndpointTests(BlogTestCase):
+    def test_exhausted_read_bucket_returns_429_with_retry_after(self):
+        url = reverse('blog:post-list-create')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_search_has_its_own_bucket(self):
+        url = reverse('blog:post-list-create')
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(self.client.get(url, {'search': 'django'}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'search': 'django'}).status_code, 429)
+
+
+class LoadSheddingTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='pw')
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch.object(DatabaseLatencyTracker, 'is_overloaded', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_expensive_requests_are_shed_with_503(self):
+        url = reverse('blog:post-list-create')
+        for response in (
+            self.client.get(url, {'search': 'django'}),
+            self.client.get(url, {'page': 50}),
+            self.client.post(url, {'title': 'T', 'content': 'C'}),
+        ):
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '5')
+        self.assertFalse(BlogPost.objects.exists())
+
+    def test_cheap_reads_are_still_served(self):
+        self.assertEqual(self.client.get(reverse('blog:post-list-create')).status_code, 200)
+
+
+class DatabaseLatencyTrackerTests(TestCase):
+    def test_average_crosses_threshold_and_recovers(self):
+        tracker = DatabaseLatencyTracker()
+        self.assertFalse(tracker.is_overloaded())
+        tracker.record(400)
+        self.assertTrue(tracker.is_overloaded())
+        for _ in range(20):
+            tracker.record(1)
+        self.assertFalse(tracker.is_overloaded())
+
+
+# Category Tests
+class CategoryStatsTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='pw')
+        self.news = Category.objects.create(name='News')
+        self.tech = Category.objects.create(name='Tech')
+
+    def refresh(self):
+        self.news.refresh_from_db()
+        self.tech.refresh_from_db()
+
+    def test_stats_follow_publishing_moves_and_deletes(self):
+        post = BlogPost.objects.create(title='One', content='c', author=self.user, category=self.news)
+        self.refresh()
+        self.assertEqual(self.news.published_post_count, 0)
+
+        post.status = 'published'
+        post.save()
+        self.refresh()
+        self.assertEqual(self.news.published_post_count, 1)
+        self.assertEqual(self.news.latest_post_at, post.created_at)
+
+        post = BlogPost.objects.get(pk=post.pk)
+        post.category = self.tech
+        post.save()
+        self.refresh()
+        self.assertEqual((self.news.published_post_count, self.news.latest_post_at), (0, None))
+        self.assertEqual(self.tech.published_post_count, 1)
+
+        post.delete()
+        self.refresh()
+        self.assertEqual(self.tech.published_post_count, 0)
+
+    def test_refresh_post_stats_rebuilds_every_category(self):
+        BlogPost.objects.create(title='One', content='c', category=self.news, status='published')
+        Category.objects.update(published_post_count=99)
+        Category.refresh_post_stats()
+        self.refresh()
+        self.assertEqual((self.news.published_post_count, self.tech.published_post_count), (1, 0))
+
+
+class CategoryViewTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.bob = User.objects.create_user('bob', password='pw')
+        self.category = Category.objects.create(name='News')
+
+    def test_category_list_is_paginated_with_stats(self):
+        BlogPost.objects.create(title='One', content='c', category=self.category, status='published')
+        response = self.client.get(reverse('blog:category-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['published_post_count'], 1)
+
+    def test_cached_category_page_skips_the_database(self):
+        url = reverse('blog:category-list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_cached_category_page_links_follow_the_current_request(self):
+        Category.objects.bulk_create(Category(name=f'Topic {index:02}') for index in range(60))
+        url = reverse('blog:category-list')
+        first = self.client.get(url, {'format': 'json', 'foo': 'bar'})
+        self.assertIn('foo=bar', first.data['next'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data['next'], 'http://testserver%s?page=2' % url)
+        self.assertIsNone(response.data['previous'])
+        self.assertEqual(response.data['count'], 61)
+        self.assertEqual(response.data['results'], first.data['results'])
+
+        self.client.get(url, {'page': 2})
+        response = self.client.get(url, {'page': 2, 'format': 'json'})
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(response.data['previous'], 'http://testserver%s?format=json' % url)
+
+    def test_cached_category_page_is_not_shared_between_users(self):
+        url = reverse('blog:category-list')
+        client = APIClient()
+        client.login(username='alice', password='pw')
+        self.assertContains(client.get(url, HTTP_ACCEPT='text/html'), 'alice')
+
+        client.logout()
+        client.login(username='bob', password='pw')
+        response = client.get(url, HTTP_ACCEPT='text/html')
+        self.assertContains(response, 'bob')
+        self.assertNotContains(response, 'alice')
+
+    def test_posts_by_category_are_paginated_with_bounded_queries(self):
+        for index in range(15):
+            post = BlogPost.objects.create(
+                title=f'Post {index}', content='c', author=self.alice, category=self.category, status='published',
+            )
+            post.liked_by.add(self.bob)
+            Comment.objects.create(post=post, author=self.bob, content='hi')
+        self.client.force_authenticate(self.bob)
+
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('blog:posts-by-category', args=[self.category.pk]))
+        self.assertEqual(response.data['count'], 15)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertTrue(all(post['is_liked'] for post in response.data['results']))
+
+
+# Comment Threading Tests
+class CommentThreadTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.post = BlogPost.objects.create(title='Threads', content='c', author=self.alice, status='published')
+
+    def comment(self, parent=None, post=None):
+        return Comment.objects.create(post=post or self.post, author=self.alice, parent=parent, content='c')
+
+    def preorder(self, comments):
+        """
+        Expected thread order: depth-first, siblings oldest first.
+        """
+        children = {}
+        for comment in comments:
+            children.setdefault(comment.parent_id, []).append(comment)
+        order = []
+
+        def visit(parent_id):
+            for child in sorted(children.get(parent_id, []), key=lambda c: c.pk):
+                order.append(child.pk)
+                visit(child.pk)
+        visit(None)
+        return order
+
+    def test_deep_chain_is_ordered_and_depth_limited(self):
+        chain = [self.comment()]
+        for _ in range(COMMENT_MAX_DEPTH):
+            chain.append(self.comment(parent=chain[-1]))
+        self.assertEqual(chain[-1].depth, COMMENT_MAX_DEPTH)
+
+        thread = list(Comment.objects.threads([chain[0]]))
+        self.assertEqual([c.pk for c in thread], [c.pk for c in chain])
+        self.assertEqual([c.pk for c in Comment.objects.threads([chain[0]], max_depth=4)], [c.pk for c in chain[:5]])
+        self.assertEqual([c.pk for c in Comment.objects.subtree(chain[10], max_depth=2)], [c.pk for c in chain[10:13]])
+
+    def test_wide_and_interleaved_threads_come_back_in_preorder(self):
+        roots = [self.comment() for _ in range(3)]
+        # Replies are created interleaved across threads so id order differs from thread order
+        for _ in range(20):
+            for root in roots:
+                reply = self.comment(parent=root)
+                self.comment(parent=reply)
+        other_post = BlogPost.objects.create(title='Other', content='c')
+        self.comment(post=other_post)
+
+        comments = list(Comment.objects.filter(post=self.post))
+        self.assertEqual([c.pk for c in Comment.objects.threads(roots)], self.preorder(comments))
+        self.assertEqual(Comment.objects.threads(roots[1:2]).count(), 41)
+        self.assertEqual(Comment.objects.threads(roots, max_depth=1).count(), 63)
+
+    def test_bulk_create_assigns_paths(self):
+        root = self.comment()
+        replies = Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.alice, parent=root, content='c') for _ in range(5)
+        )
+        self.assertTrue(all(reply.depth == 1 and reply.path.startswith(root.path) for reply in replies))
+        self.assertEqual(Comment.objects.threads([root]).count(), 6)
+
+    def test_failed_path_write_rolls_back_the_insert(self):
+        with mock.patch.object(CommentQuerySet, 'update', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.comment()
+        self.assertFalse(Comment.objects.exists())
+
+    def test_thread_page_uses_constant_queries(self):
+        for _ in range(25):
+            root = self.comment()
+            for _ in range(5):
+                self.comment(parent=self.comment(parent=root))
+        url = reverse('blog:comment-list-create', args=[self.post.pk])
+
+        # Count, page of roots, then every thread on the page in one query
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(len(response.data['results'][0]['replies']), 5)
+        self.assertEqual(len(response.data['results'][0]['replies'][0]['replies']), 1)
+
+        response = self.client.get(url, {'depth': 1})
+        self.assertEqual(response.data['results'][0]['replies'][0]['replies'], [])
+
+    def test_subtree_endpoint_uses_constant_queries(self):
+        root = self.comment()
+        for _ in range(10):
+            self.comment(parent=self.comment(parent=root))
+
+        # The comment itself, then its whole subtree
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('blog:comment-thread', args=[root.pk]))
+        self.assertEqual(len(response.data['replies']), 10)
+
+        response = self.client.get(reverse('blog:comment-thread', args=[root.pk]), {'depth': 1})
+        self.assertEqual(response.data['replies'][0]['replies'], [])
+
+    def test_reply_must_belong_to_the_same_post(self):
+        other_post = BlogPost.objects.create(title='Other', content='c')
+        parent = self.comment(post=other_post)
+        self.client.force_authenticate(self.alice)
+        response = self.client.post(
+            reverse('blog:comment-list-create', args=[self.post.pk]),
+            {'post': self.post.pk, 'parent': parent.pk, 'content': 'hi'},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_update_cannot_move_a_comment(self):
+        root = self.comment()
+        reply = self.comment(parent=root)
+        other_post = BlogPost.objects.create(title='Other', content='c')
+        self.client.force_authenticate(self.alice)
+
+        response = self.client.patch(
+            reverse('blog:comment-detail', args=[reply.pk]), {'post': other_post.pk, 'parent': None}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        reply.refresh_from_db()
+        self.assertEqual((reply.post_id, reply.parent_id), (self.post.pk, root.pk))
+
+    def test_benchmark_command_runs_and_rolls_back(self):
+        out = StringIO()
+        call_command('benchmark_comment_threads', threads=3, depth=5, width=3, stdout=out)
+        self.assertIn('Seeded 48 comments', out.getvalue())
+        self.assertFalse(BlogPost.objects.filter(title='Comment thread benchmark').exists())
+
+
+# Post Deletion Tests
+class SoftDeleteTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.category = Category.objects.create(name='News')
+        self.post = BlogPost.objects.create(
+            title='Doomed', content='c', author=self.alice, category=self.category, status='published',
+        )
+        self.comment = Comment.objects.create(post=self.post, author=self.alice, content='c')
+        self.client.force_authenticate(self.alice)
+
+    def test_deleted_post_disappears_from_every_view_at_once(self):
+        response = self.client.delete(
+            reverse('blog:post-detail', args=[self.post.slug]), {'confirm_delete': True}, format='json',
+            HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 204)
+        # Hidden, not yet purged
+        self.assertTrue(Comment.objects.filter(pk=self.comment.pk).exists())
+
+        self.assertEqual(self.client.get(reverse('blog:post-list-create')).data['count'], 0)
+        self.assertEqual(self.client.get(reverse('blog:post-detail', args=[self.post.slug])).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse('blog:posts-by-category', args=[self.category.pk])).data['count'], 0,
+        )
+        self.assertEqual(self.client.get(reverse('blog:comment-list-create', args=[self.post.pk])).data['count'], 0)
+        self.assertEqual(self.client.get(reverse('blog:comment-detail', args=[self.comment.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('blog:comment-thread', args=[self.comment.pk])).status_code, 404)
+        self.assertEqual(
+            self.client.post(
+                reverse('blog:comment-list-create', args=[self.post.pk]), {'post': self.post.pk, 'content': 'late'},
+            ).status_code,
+            404,
+        )
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.published_post_count, 0)
+
+
+class PurgeTests(TransactionTestCase):
+    """
+    Runs outside a wrapping transaction so each purge chunk really commits.
+    """
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.post = BlogPost.objects.create(title='Doomed', content='c', author=self.alice, status='published')
+        self.other_post = BlogPost.objects.create(title='Kept', content='c', author=self.alice, status='published')
+        root = Comment.objects.create(post=self.post, author=self.alice, content='c')
+        for _ in range(6):
+            Comment.objects.create(post=self.post, author=self.alice, parent=root, content='c')
+        self.likers = [User.objects.create_user(f'fan{index}') for index in range(5)]
+        self.post.liked_by.add(*self.likers)
+        Comment.objects.create(post=self.other_post, author=self.alice, content='c')
+        self.post.soft_delete()
+
+    def remaining(self):
+        return (
+            Comment.objects.filter(post_id=self.post.pk).count(),
+            BlogPost.liked_by.through.objects.filter(blogpost_id=self.post.pk).count(),
+        )
+
+    def test_purge_deletes_in_bounded_chunks_while_reads_keep_working(self):
+        client = APIClient()
+        snapshots = []
+
+        def between_chunks(seconds):
+            snapshots.append(self.remaining())
+            self.assertEqual(client.get(reverse('blog:post-list-create')).data['count'], 1)
+            self.assertEqual(
+                client.get(reverse('blog:comment-list-create', args=[self.other_post.pk])).status_code, 200,
+            )
+
+        with mock.patch('blog.purge.time.sleep', side_effect=between_chunks):
+            result = purge_post(self.post.pk, chunk_size=3, pause=0.01)
+
+        self.assertEqual(result, {'comments': 7, 'likes': 5})
+        self.assertEqual(snapshots, [(4, 5), (1, 5), (0, 5), (0, 2), (0, 0)])
+        self.assertFalse(BlogPost.objects.filter(pk=self.post.pk).exists())
+        self.assertEqual(Comment.objects.filter(post=self.other_post).count(), 1)
+        self.assertEqual(User.objects.filter(pk__in=[user.pk for user in self.likers]).count(), 5)
+
+    def test_interrupted_purge_keeps_finished_chunks_and_resumes(self):
+        with mock.patch('blog.purge.time.sleep', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                purge_post(self.post.pk, chunk_size=3, pause=0.01)
+        # The first chunk was committed on its own
+        self.assertEqual(self.remaining(), (4, 5))
+        self.assertTrue(BlogPost.objects.filter(pk=self.post.pk).exists())
+
+        out = StringIO()
+        call_command('purge_deleted_posts', chunk_size=3, stdout=out)
+        self.assertIn(f'Purged post {self.post.pk}: 4 comments, 5 likes.', out.getvalue())
+        self.assertEqual(self.remaining(), (0, 0))
+        self.assertFalse(BlogPost.objects.filter(pk=self.post.pk).exists())
+
+    def test_purge_leaves_visible_posts_alone(self):
+        purge_post(self.other_post.pk)
+        self.assertTrue(BlogPost.objects.filter(pk=self.other_post.pk).exists())
+
+
+# Admin Tests
+class AdminChangelistTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.category = Category.objects.create(name='News')
+        for index in range(5):
+            post = BlogPost.objects.create(
+                title=f'Django tips {index}', content='c', author=self.alice, category=self.category,
+            )
+            Comment.objects.create(post=post, author=self.alice, content='c')
+        BlogPost.objects.create(title='Flask notes', content='django inside', author=self.admin)
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_changelists_do_not_query_per_row(self):
+        for model in ('blogpost', 'comment'):
+            url = reverse(f'admin:blog_{model}_changelist')
+            _, few = self.changelist_queries(url)
+            for index in range(10):
+                post = BlogPost.objects.create(title=f'More {model} {index}', content='c', author=self.alice)
+                Comment.objects.create(post=post, author=self.alice, content='c')
+            _, many = self.changelist_queries(url)
+            self.assertEqual(len(few), len(many), model)
+
+    def test_search_uses_prefix_and_exact_lookups(self):
+        url = reverse('admin:blog_blogpost_changelist')
+        response, queries = self.changelist_queries(url, q='Django')
+        self.assertEqual(response.context['cl'].result_count, 5)
+        # Never an unanchored substring match on title or content
+        self.assertFalse(any('%Django' in query['sql'] for query in queries))
+
+    def test_delete_view_soft_deletes_and_schedules_a_purge(self):
+        post = BlogPost.objects.filter(author=self.alice).first()
+        url = reverse('admin:blog_blogpost_delete', args=[post.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Comment by')
+
+        with mock.patch('blog.admin.schedule_purge') as schedule:
+            response = self.client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        schedule.assert_called_once_with([post.pk])
+        post.refresh_from_db()
+        self.assertIsNotNone(post.deleted_at)
+        self.assertEqual(Comment.objects.filter(post=post).count(), 1)
+
+    def test_delete_selected_soft_deletes_and_schedules_one_purge(self):
+        BlogPost.objects.filter(author=self.alice).update(status='published')
+        Category.refresh_post_stats()
+        post_ids = sorted(BlogPost.objects.filter(author=self.alice).values_list('pk', flat=True))
+        url = reverse('admin:blog_blogpost_changelist')
+        with mock.patch('blog.admin.schedule_purge') as schedule:
+            with mock.patch('blog.admin.autocomplete_index') as index:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(url, {
+                        'action': 'delete_selected', '_selected_action': post_ids, 'post': 'yes',
+                    })
+        self.assertEqual(response.status_code, 302)
+        schedule.assert_called_once()
+        self.assertEqual(sorted(schedule.call_args.args[0]), post_ids)
+        self.assertEqual(sorted(index.refresh_posts.call_args.args[0]), post_ids)
+        self.assertEqual(BlogPost.objects.pending_purge().count(), 5)
+        self.assertEqual(Comment.objects.count(), 5)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.published_post_count, 0)
+
+        response, _ = self.changelist_queries(url, q='alice')
+        self.assertEqual(response.context['cl'].result_count, 5)
+
+        response, _ = self.changelist_queries(reverse('admin:blog_comment_changelist'), q='django-tips-0')
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+# Bulk Moderation Tests
+class BulkPostModerationTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.bob = User.objects.create_user('bob', password='pw')
+        self.moderator = User.objects.create_user('mod', password='pw', is_staff=True)
+        self.category = Category.objects.create(name='News')
+        self.alice_posts = [
+            BlogPost.objects.create(title=f'Alice {index}', content='c', author=self.alice, category=self.category)
+            for index in range(5)
+        ]
+        self.bob_post = BlogPost.objects.create(title='Bob', content='c', author=self.bob, category=self.category)
+        self.url = reverse('blog:bulk-post-moderation')
+
+    def moderate(self, user, **payload):
+        self.client.force_authenticate(user)
+        return self.client.post(self.url, payload, format='json', HTTP_ACCEPT='application/json')
+
+    def test_results_are_reported_per_id_and_scoped_to_the_caller(self):
+        ids = [self.alice_posts[0].pk, self.bob_post.pk, 999999]
+        response = self.moderate(self.alice, action='publish', ids=ids)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'id': ids[0], 'result': 'published'},
+            {'id': ids[1], 'result': 'forbidden'},
+            {'id': ids[2], 'result': 'not_found'},
+        ])
+        self.assertEqual(response.data['processed'], 1)
+        self.bob_post.refresh_from_db()
+        self.assertEqual(self.bob_post.status, 'draft')
+
+        response = self.moderate(self.moderator, action='publish', ids=ids[1:2])
+        self.assertEqual(response.data['results'], [{'id': ids[1], 'result': 'published'}])
+
+    def test_ids_are_processed_in_chunks_of_set_based_updates(self):
+        ids = [post.pk for post in self.alice_posts]
+        with mock.patch.object(BulkPostModerationView, 'chunk_size', 2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.moderate(self.alice, action='publish', ids=ids)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "blog_blogpost"')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(response.data['processed'], 5)
+        self.assertEqual(BlogPost.objects.filter(status='published').count(), 5)
+
+    def test_deletes_across_chunks_schedule_a_single_purge(self):
+        ids = [post.pk for post in self.alice_posts]
+        with mock.patch.object(BulkPostModerationView, 'chunk_size', 2):
+            with mock.patch('blog.views.schedule_purge') as schedule:
+                response = self.moderate(self.alice, action='delete', ids=ids)
+        self.assertEqual(response.data['processed'], 5)
+        schedule.assert_called_once_with(ids)
+
+        with mock.patch('blog.views.schedule_purge') as schedule:
+            self.moderate(self.alice, action='delete', ids=ids)
+        schedule.assert_not_called()
+
+    def test_category_stats_and_autocomplete_follow_bulk_updates(self):
+        ids = [post.pk for post in self.alice_posts]
+        with mock.patch('blog.views.autocomplete_index') as index:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.moderate(self.alice, action='publish', ids=ids)
+        index.refresh_posts.assert_called_once()
+        self.assertEqual(sorted(index.refresh_posts.call_args.args[0]), ids)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.published_post_count, 5)
+
+        self.moderate(self.alice, action='delete', ids=ids[:2])
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.published_post_count, 3)
+        self.assertEqual(BlogPost.objects.pending_purge().count(), 2)
+
+    def test_filter_mode_is_scoped_and_flags_truncation(self):
+        with mock.patch('blog.views.BULK_MODERATION_MAX_ITEMS', 3):
+            response = self.moderate(self.alice, action='publish', filter={'category': self.category.pk})
+        self.assertTrue(response.data['truncated'])
+        self.assertEqual([item['id'] for item in response.data['results']], [post.pk for post in self.alice_posts[:3]])
+
+        response = self.moderate(self.alice, action='publish', filter={'status': 'draft'})
+        self.assertFalse(response.data['truncated'])
+        self.assertEqual(len(response.data['results']), 2)
+        self.bob_post.refresh_from_db()
+        self.assertEqual(self.bob_post.status, 'draft')
+
+    def test_repeating_a_truncated_request_reaches_every_row(self):
+        for action, target in (('publish', 'published'), ('unpublish', 'draft')):
+            processed = []
+            with mock.patch('blog.views.BULK_MODERATION_MAX_ITEMS', 2):
+                for _ in range(5):
+                    response = self.moderate(self.alice, action=action, filter={'category': self.category.pk})
+                    processed.append(response.data['processed'])
+                    if not response.data['truncated']:
+                        break
+            self.assertEqual(processed, [2, 2, 1])
+            self.assertEqual(BlogPost.objects.filter(author=self.alice, status=target).count(), 5)
+        self.bob_post.refresh_from_db()
+        self.assertEqual(self.bob_post.status, 'draft')
+
+    def test_ids_or_filter_is_required(self):
+        self.assertEqual(self.moderate(self.alice, action='publish').status_code, 400)
+        response = self.moderate(self.alice, action='publish', ids=[1], filter={'status': 'draft'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.moderate(self.alice, action='publish', filter={}).status_code, 400)
+
+
+class BulkCommentModerationTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice', password='pw')
+        self.bob = User.objects.create_user('bob', password='pw')
+        self.moderator = User.objects.create_user('mod', password='pw', is_staff=True)
+        self.post = BlogPost.objects.create(title='Post', content='c', author=self.alice)
+        self.url = reverse('blog:bulk-comment-moderation')
+
+    def comment(self, author, parent=None):
+        return Comment.objects.create(post=self.post, author=author, parent=parent, content='c')
+
+    def moderate(self, user, **payload):
+        self.client.force_authenticate(user)
+        return self.client.post(self.url, {'action': 'delete', **payload}, format='json', HTTP_ACCEPT='application/json')
+
+    def test_non_staff_cannot_cascade_into_other_users_replies(self):
+        root = self.comment(self.alice)
+        bobs_reply = self.comment(self.bob, parent=self.comment(self.alice, parent=root))
+
+        response = self.moderate(self.alice, ids=[root.pk])
+        self.assertEqual(response.data['results'], [{'id': root.pk, 'result': 'forbidden'}])
+        self.assertTrue(Comment.objects.filter(pk=bobs_reply.pk).exists())
+
+        response = self.moderate(self.moderator, ids=[root.pk])
+        self.assertEqual(response.data['results'], [{'id': root.pk, 'result': 'deleted'}])
+        self.assertEqual(len(response.data['cascaded']), 2)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_cascaded_replies_are_reported_not_lost(self):
+        root = self.comment(self.alice)
+        listed_reply = self.comment(self.alice, parent=root)
+        unlisted_reply = self.comment(self.alice, parent=root)
+
+        with mock.patch.object(BulkCommentModerationView, 'chunk_size', 1):
+            response = self.moderate(self.alice, ids=[root.pk, listed_reply.pk])
+        self.assertEqual(response.data['results'], [
+            {'id': root.pk, 'result': 'deleted'},
+            {'id': listed_reply.pk, 'result': 'deleted'},
+        ])
+        self.assertEqual(response.data['processed'], 2)
+        self.assertEqual(response.data['cascaded'], [unlisted_reply.pk])
+
+    def test_filter_mode_deletes_only_the_callers_comments(self):
+        for _ in range(3):
+            self.comment(self.alice)
+        bobs = self.comment(self.bob)
+        response = self.moderate(self.alice, filter={'post': self.post.pk})
+        self.assertEqual(response.data['processed'], 3)
+        self.assertEqual(list(Comment.objects.values_list('pk', flat=True)), [bobs.pk])
+
+
+# Autocomplete Tests
+class AutocompleteIndexTests(BlogTestCase):
+    """
+    Two AutocompleteIndex instances sharing the cache stand in for two worker processes.
+    """
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='Djangonauts')
+        self.post = BlogPost.objects.create(title='Intro to Django', content='c', status='published')
+        BlogPost.objects.create(title='Django drafts', content='c')
+        self.writer, self.reader = AutocompleteIndex(), AutocompleteIndex()
+        self.writer.poll_interval = self.reader.poll_interval = 0
+        patcher = mock.patch('blog.signals.autocomplete_index', self.writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.writer.search('x')
+        self.reader.search('x')
+
+    def titles(self, index, prefix):
+        return sorted(item.get('title') or item.get('name') for item in index.search(prefix))
+
+    def test_lookup_matches_word_starts_of_published_titles_and_categories(self):
+        self.assertEqual(self.titles(self.reader, 'dja'), ['Djangonauts', 'Intro to Django'])
+        self.assertEqual(self.titles(self.reader, 'INTRO t'), ['Intro to Django'])
+        self.assertEqual(self.reader.search(''), [])
+
+    def test_changes_reach_other_processes_as_deltas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = BlogPost.objects.create(title='Django signals', content='c', status='published')
+        # Replayed from the change log, no rebuild from the database
+        with self.assertNumQueries(0):
+            self.assertIn('Django signals', self.titles(self.reader, 'django s'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = 'Flask signals'
+            post.save()
+        self.assertEqual(self.titles(self.reader, 'django s'), [])
+        self.assertEqual(self.titles(self.reader, 'flask'), ['Flask signals'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.soft_delete()
+            self.category.delete()
+        self.assertEqual(self.titles(self.reader, 'flask'), [])
+        self.assertEqual(self.titles(self.reader, 'djangon'), [])
+
+    def test_content_only_edits_publish_nothing(self):
+        sequence = cache.get(AutocompleteIndex.sequence_key, 0)
+        post = BlogPost.objects.get(pk=self.post.pk)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            post.content = 'edited'
+            post.save()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(cache.get(AutocompleteIndex.sequence_key, 0), sequence)
+
+    def test_bulk_refresh_publishes_removals(self):
+        BlogPost.objects.filter(pk=self.post.pk).update(status='draft')
+        self.writer.refresh_posts([self.post.pk])
+        self.assertEqual(self.titles(self.writer, 'intro'), [])
+        self.assertEqual(self.titles(self.reader, 'intro'), [])
+
+    def test_missing_change_log_entries_trigger_a_rebuild(self):
+        self.reader._start_rebuild = self.reader._rebuild
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogPost.objects.create(title='Lost change', content='c', status='published')
+            BlogPost.objects.create(title='Later change', content='c', status='published')
+        cache.delete(AutocompleteIndex.change_key % 1)
+
+        # First sighting of the gap: wait in case the writer is mid-publish
+        self.assertEqual(self.titles(self.reader, 'l'), [])
+        self.assertEqual(self.titles(self.reader, 'l'), ['Later change', 'Lost change'])
+
+    def test_lookups_are_served_from_the_old_index_during_a_rebuild(self):
+        building, release = threading.Event(), threading.Event()
+        build = PrefixIndex.build
+
+        def slow_build(entries):
+            building.set()
+            release.wait(5)
+            return build([('post', 1, 'Rebuilt', post_payload(1, 'Rebuilt', 'rebuilt'))])
+
+        with mock.patch.object(PrefixIndex, 'build', side_effect=slow_build):
+            rebuild = threading.Thread(target=self.reader._rebuild)
+            rebuild.start()
+            self.assertTrue(building.wait(5))
+            self.assertEqual(self.titles(self.reader, 'intro'), ['Intro to Django'])
+            release.set()
+            rebuild.join(5)
+        self.assertEqual(self.titles(self.reader, 'rebuilt'), ['Rebuilt'])
+
+    def test_memory_footprint_is_reported(self):
+        stats = self.reader.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertGreater(stats['bytes'], 0)
+        self.assertIsNotNone(stats['build_seconds'])
+
+
+class AutocompleteViewTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(15):
+            BlogPost.objects.create(title=f'Django tip {index}', content='c', status='published')
+        patcher = mock.patch('blog.views.autocomplete_index', AutocompleteIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_suggestions_are_limited(self):
+        url = reverse('blog:autocomplete')
+        self.assertEqual(len(self.client.get(url, {'q': 'django'}).data['results']), 10)
+        self.assertEqual(len(self.client.get(url, {'q': 'django', 'limit': 3}).data['results']), 3)
+        self.assertEqual(len(self.client.get(url, {'q': 'django', 'limit': 500}).data['results']), 15)
+        self.assertEqual(self.client.get(url, {'q': 'django', 'limit': 'x'}).status_code, 400)
+        # Served from memory once built
+        with self.assertNumQueries(0):
+            self.client.get(url, {'q': 'tip'})
@@ -0,0 +1,211 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.db import connection
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+
+LOAD_SHEDDING_DEFAULTS = {
+    'DB_LATENCY_THRESHOLD_MS': 250,  # Shed expensive requests above this average query time
+    'MAX_CHEAP_PAGE': 5,             # Pages beyond this are treated as expensive
+    'RETRY_AFTER': 5,                # Seconds clients are asked to wait when shed
+    'SAMPLE_TTL': 30,                # Forget the measured latency after this many idle seconds
+}
+
+
+def load_shedding_setting(name):
+    return getattr(settings, 'LOAD_SHEDDING', {}).get(name, LOAD_SHEDDING_DEFAULTS[name])
+
+
+def is_search_request(request):
+    return bool(request.query_params.get('search'))
+
+
+def is_expensive_request(request):
+    """
+    Writes, searches and deep pages are the requests we drop first under load.
+    """
+    if request.method not in SAFE_METHODS or is_search_request(request):
+        return True
+    try:
+        page = int(request.query_params.get('page', 1))
+    except ValueError:
+        return False
+    return page > load_shedding_setting('MAX_CHEAP_PAGE')
+
+
+# Database latency tracking
+class DatabaseLatencyTracker:
+    """
+    Exponentially weighted moving average of query time for this process.
+    """
+    alpha = 0.2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._average_ms = 0.0
+        self._last_sample = 0.0
+
+    def record(self, duration_ms):
+        with self._lock:
+            if self._last_sample:
+                self._average_ms += self.alpha * (duration_ms - self._average_ms)
+            else:
+                self._average_ms = duration_ms
+            self._last_sample = time.monotonic()
+
+    @property
+    def average_ms(self):
+        if time.monotonic() - self._last_sample > load_shedding_setting('SAMPLE_TTL'):
+            return 0.0
+        return self._average_ms
+
+    def is_overloaded(self):
+        return self.average_ms > load_shedding_setting('DB_LATENCY_THRESHOLD_MS')
+
+
+db_latency = DatabaseLatencyTracker()
+
+
+class DatabaseLatencyMiddleware:
+    """
+    Times every query run while handling a request and feeds it to `db_latency`.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connection.execute_wrapper(self._time_query):
+            return self.get_response(request)
+
+    def _time_query(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            db_latency.record((time.monotonic() - start) * 1000)
+
+
+# Throttles
+class ServiceOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The service is under heavy load. Please retry shortly.'
+    default_code = 'service_overloaded'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket per user (or IP for anonymous clients) and scope, kept in the shared cache.
+
+    The bucket holds up to `num_requests` tokens and refills at `num_requests / duration`
+    tokens per second, so short bursts are allowed while the sustained rate is capped.
+    Each read-modify-write of a bucket runs under a short lock taken with `cache.add`,
+    which is atomic on the local-memory, Redis and memcached backends.
+    """
+    cache = default_cache
+    cache_format = 'throttle_bucket_%(scope)s_%(ident)s'
+    lock_timeout = 1        # Seconds before a lock left by a crashed worker expires
+    lock_wait = 0.05        # Seconds to wait for a contended bucket before giving up
+    lock_retry_delay = 0.002
+
+    def applies_to(self, request, view):
+        return True
+
+    def get_cache_key(self, request, view):
+        if not self.applies_to(request, view):
+            return None
+        if request.user and request.user.is_authenticated:
+            ident = 'user_%s' % request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        lock_key = self.key + '_lock'
+        if not self.acquire_lock(lock_key):
+            # Another request is spending from this bucket right now; ask the client to back off
+            self.wait_time = self.lock_timeout
+            return False
+        try:
+            return self.spend_token()
+        finally:
+            self.cache.delete(lock_key)
+
+    def acquire_lock(self, lock_key):
+        deadline = time.monotonic() + self.lock_wait
+        while not self.cache.add(lock_key, 1, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.lock_retry_delay)
+        return True
+
+    def spend_token(self):
+        now = self.timer()
+        refill_rate = self.num_requests / self.duration
+        tokens, last_seen = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(self.num_requests, tokens + (now - last_seen) * refill_rate)
+
+        if tokens < 1:
+            self.wait_time = (1 - tokens) / refill_rate
+            self.cache.set(self.key, (tokens, now), self.duration)
+            return False
+
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return getattr(self, 'wait_time', None)
+
+
+class ReadThrottle(TokenBucketThrottle):
+    scope = 'read'
+
+    def applies_to(self, request, view):
+        return request.method in SAFE_METHODS and not is_search_request(request)
+
+
+class SearchThrottle(TokenBucketThrottle):
+    scope = 'search'
+
+    def applies_to(self, request, view):
+        return request.method in SAFE_METHODS and is_search_request(request)
+
+
+class WriteThrottle(TokenBucketThrottle):
+    scope = 'write'
+
+    def applies_to(self, request, view):
+        return request.method not in SAFE_METHODS
+
+
+class AutocompleteThrottle(TokenBucketThrottle):
+    """
+    Type-ahead fires a request per keystroke, so it gets its own, larger bucket.
+    """
+    scope = 'autocomplete'
+
+
+class LoadSheddingThrottle(BaseThrottle):
+    """
+    Rejects expensive requests with 503 while the database is slow; cheap reads pass through.
+    """
+    def allow_request(self, request, view):
+        if db_latency.is_overloaded() and is_expensive_request(request):
+            raise ServiceOverloaded(wait=load_shedding_setting('RETRY_AFTER'))
+        return True
@@ -6,6 +6,10 @@ from .views import (
     PostsByCategoryView,
     CommentListCreateView,
     CommentDetailView,
+    CommentThreadView,
+    BulkPostModerationView,
+    BulkCommentModerationView,
+    AutocompleteView,
     RegisterView, LoginView, LogoutView
 )
 
@@ -18,6 +22,10 @@ urlpatterns = [
     path('categories/<int:category_id>/posts/', PostsByCategoryView.as_view(), name='posts-by-category'),
     path('posts/<int:post_id>/comments/', CommentListCreateView.as_view(), name='comment-list-create'),
     path('comments/<int:pk>/', CommentDetailView.as_view(), name='comment-detail'),
+    path('comments/<int:pk>/thread/', CommentThreadView.as_view(), name='comment-thread'),
+    path('moderation/posts/', BulkPostModerationView.as_view(), name='bulk-post-moderation'),
+    path('moderation/comments/', BulkCommentModerationView.as_view(), name='bulk-comment-moderation'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
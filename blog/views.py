@@ -1,19 +1,28 @@
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import BlogPost, Category, Comment
-from .serializers import BlogPostSerializer, CategorySerializer, CommentSerializer, LoginSerializer, RegisterSerializer, LogoutSerializer, DeleteBlogPostSerializer
+from .models import BlogPost, Category, Comment, COMMENT_MAX_DEPTH
+from .purge import schedule_purge
+from .autocomplete import autocomplete_index
+from .throttling import AutocompleteThrottle
+from .serializers import BlogPostSerializer, CategorySerializer, CommentSerializer, CommentThreadSerializer, build_comment_tree, LoginSerializer, RegisterSerializer, LogoutSerializer, DeleteBlogPostSerializer
+from .serializers import BulkPostModerationSerializer, BulkCommentModerationSerializer, BULK_MODERATION_MAX_ITEMS
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.authtoken.models import Token
-from django.shortcuts import redirect
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from django.http import HttpResponseRedirect
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.deletion import Collector
+from django.utils import timezone
+from django.core.cache import cache
 
 
 
@@ -22,12 +31,33 @@ class BlogPostPagination(PageNumberPagination):
     page_size = 10
 
 
+class CategoryPagination(PageNumberPagination):
+    page_size = 50
+
+
+class CommentThreadPagination(PageNumberPagination):
+    """
+    Pages over top-level comments; each one comes back with its whole thread.
+    """
+    page_size = 20
+
+
+def get_depth_param(request):
+    depth = request.query_params.get('depth')
+    if depth is None:
+        return None
+    try:
+        return max(int(depth), 0)
+    except ValueError:
+        raise ValidationError({'depth': 'Must be an integer.'})
+
+
 # BlogPost Views
 class BlogPostListCreateView(generics.ListCreateAPIView):
     """
     View to list all blog posts or create a new post.
     """
-    queryset = BlogPost.objects.filter(status='published')
+    queryset = BlogPost.objects.visible().filter(status='published')
     serializer_class = BlogPostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     pagination_class = BlogPostPagination
@@ -43,7 +73,7 @@ class BlogPostDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     View to retrieve, update, or delete a specific blog post.
     """
-    queryset = BlogPost.objects.all()
+    queryset = BlogPost.objects.visible()
     serializer_class = BlogPostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'  # ✅ This line ensures it works with slugs
@@ -53,6 +83,11 @@ class BlogPostDetailView(generics.RetrieveUpdateDestroyAPIView):
             raise PermissionDenied("You can only edit your own posts.")
         serializer.save()
 
+    def perform_destroy(self, instance):
+        # Hide the post right away; comments and likes are purged in chunks afterwards
+        instance.soft_delete()
+        schedule_purge([instance.pk])
+
     def delete(self, request, *args, **kwargs):
         """
         Override DELETE to show a confirmation form for the browsable API.
@@ -70,11 +105,32 @@ class BlogPostDetailView(generics.RetrieveUpdateDestroyAPIView):
 # Category Views
 class CategoryListView(generics.ListAPIView):
     """
-    View to list all categories.
+    View to list all categories with their published post counts.
+    Each page's data is cached briefly since the stats only change when posts do; only
+    the data is shared, the response itself is rendered per request.
     """
-    queryset = Category.objects.all()
+    queryset = Category.objects.order_by('name')
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = CategoryPagination
+    cache_timeout = 60
+
+    def list(self, request, *args, **kwargs):
+        page = request.query_params.get(self.paginator.page_query_param, '1')
+        if not page.isdigit():
+            return super().list(request, *args, **kwargs)
+        cache_key = 'category_list_page_%s' % page
+        data = cache.get(cache_key)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            cache.set(cache_key, {'count': response.data['count'], 'results': response.data['results']}, self.cache_timeout)
+            return response
+        # The next/previous links are built from this request, not the one that filled the cache
+        self.paginator.request = request
+        self.paginator.page = self.paginator.django_paginator_class(
+            range(data['count']), self.paginator.page_size,
+        ).page(page)
+        return self.paginator.get_paginated_response(data['results'])
 
 
 class PostsByCategoryView(generics.ListAPIView):
@@ -82,40 +138,76 @@ class PostsByCategoryView(generics.ListAPIView):
     View to list posts by category.
     """
     serializer_class = BlogPostSerializer
+    pagination_class = BlogPostPagination
 
     def get_queryset(self):
         category_id = self.kwargs.get('category_id')
-        return BlogPost.objects.filter(category__id=category_id, status='published')
+        return (
+            BlogPost.objects.visible().filter(category__id=category_id, status='published')
+            .select_related('author', 'category')
+            .prefetch_related('liked_by', 'comments__author')
+        )
 
 
 # Comment Views
 class CommentListCreateView(generics.ListCreateAPIView):
     """
     View to list or create comments for a blog post.
+    Listing is paginated by top-level comment; `?depth=N` limits how deep replies go.
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CommentThreadPagination
 
     def get_queryset(self):
         post_id = self.kwargs.get('post_id')
-        return Comment.objects.filter(post__id=post_id)
+        return Comment.objects.filter(post__id=post_id, post__deleted_at__isnull=True)
+
+    def list(self, request, *args, **kwargs):
+        roots = self.paginate_queryset(self.get_queryset().roots().only('post_id', 'path').order_by('path'))
+        comments = Comment.objects.threads(roots, max_depth=get_depth_param(request)).select_related('author')
+        serializer = CommentThreadSerializer(build_comment_tree(comments), many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, post_id=self.kwargs.get('post_id'))
+        post = get_object_or_404(BlogPost.objects.visible(), pk=self.kwargs.get('post_id'))
+        parent = serializer.validated_data.get('parent')
+        if parent is not None:
+            if parent.post_id != post.pk:
+                raise ValidationError({'parent': 'Replies must belong to the same post.'})
+            if parent.depth >= COMMENT_MAX_DEPTH:
+                raise ValidationError({'parent': 'This thread is nested too deeply.'})
+        serializer.save(author=self.request.user, post=post)
+
+
+class CommentThreadView(generics.RetrieveAPIView):
+    """
+    View to retrieve a comment with its replies; `?depth=N` limits levels below it.
+    """
+    queryset = Comment.objects.filter(post__deleted_at__isnull=True)
+    serializer_class = CommentThreadSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def retrieve(self, request, *args, **kwargs):
+        root = self.get_object()
+        comments = Comment.objects.subtree(root, max_depth=get_depth_param(request)).select_related('author')
+        serializer = self.get_serializer(build_comment_tree(comments)[0])
+        return Response(serializer.data)
 
 
 class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     View to retrieve, update, or delete a specific comment.
     """
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.filter(post__deleted_at__isnull=True)
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def perform_update(self, serializer):
         if serializer.instance.author != self.request.user:
             raise PermissionDenied("You can only edit your own comments.")
-        serializer.save()
+        # Moving a comment would invalidate its materialized path and its replies' paths
+        serializer.save(post=serializer.instance.post, parent=serializer.instance.parent)
 
     def perform_destroy(self, instance):
         # Ensure only the author can delete the comment
@@ -124,6 +216,181 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.delete()
 
 
+# Autocomplete View
+class AutocompleteView(APIView):
+    """
+    View to suggest published post titles and category names for a typed prefix.
+    Served from the in-process prefix index; `?q=<prefix>&limit=<n>`.
+    """
+    permission_classes = [AllowAny]
+    throttle_classes = [AutocompleteThrottle]
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+        results = autocomplete_index.search(request.query_params.get('q', ''), max(limit, 0))
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+# Bulk Moderation Views
+class BulkModerationView(APIView):
+    """
+    Base view for applying one moderation action to many rows with set-based statements.
+    Staff may moderate any row; other users only rows they authored. That restriction is
+    part of every UPDATE/DELETE. Each requested id is reported with its outcome, and rows
+    removed along with them (cascaded replies) are listed under `cascaded`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [BrowsableAPIRenderer, JSONRenderer]
+    queryset = None
+    filter_lookups = {}  # Filter name accepted in the request -> model lookup
+    chunk_size = 1000
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def get_permitted_queryset(self):
+        queryset = self.get_queryset()
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(author=self.request.user)
+
+    def filter_queryset(self, queryset, filters):
+        return queryset.filter(**{self.filter_lookups[name]: value for name, value in filters.items()})
+
+    def get_pending_queryset(self, action, queryset):
+        """
+        Rows of `queryset` that `action` would still change. Filter mode only picks from
+        these, so repeating a truncated request moves on to the rows not yet handled.
+        """
+        return queryset
+
+    def apply_action(self, action, queryset):
+        """
+        Apply `action` to `queryset` (already restricted to permitted rows) and return the
+        result for every row it affected, keyed by id. The default deletes the rows along
+        with anything that cascades from them.
+        """
+        deleted = set(queryset.values_list('pk', flat=True))
+        collector = Collector(using=queryset.db)
+        collector.collect(queryset)
+        deleted.update(obj.pk for obj in collector.data.get(queryset.model, ()))
+        collector.delete()
+        return dict.fromkeys(deleted, 'deleted')
+
+    def finalize_action(self, action, affected):
+        """
+        Called once after every chunk has been applied, with the results of all of them.
+        """
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        action = serializer.validated_data['action']
+        permitted = self.get_permitted_queryset()
+
+        truncated = False
+        if 'ids' in serializer.validated_data:
+            ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        else:
+            matching = self.get_pending_queryset(action, self.filter_queryset(permitted, serializer.validated_data['filter']))
+            ids = list(matching.order_by('pk').values_list('pk', flat=True)[:BULK_MODERATION_MAX_ITEMS + 1])
+            # More rows matched than one call handles; the client repeats the request for the rest
+            truncated = len(ids) > BULK_MODERATION_MAX_ITEMS
+            ids = ids[:BULK_MODERATION_MAX_ITEMS]
+
+        affected = {}
+        results = []
+        for start in range(0, len(ids), self.chunk_size):
+            chunk = ids[start:start + self.chunk_size]
+            # Rows an earlier chunk already removed through a cascade are reported, not re-checked
+            pending = [pk for pk in chunk if pk not in affected]
+            allowed = set(permitted.filter(pk__in=pending).values_list('pk', flat=True)) if pending else set()
+            denied = [pk for pk in pending if pk not in allowed]
+            existing = set(self.get_queryset().filter(pk__in=denied).values_list('pk', flat=True)) if denied else set()
+            if allowed:
+                affected.update(self.apply_action(action, permitted.filter(pk__in=allowed)))
+            for pk in chunk:
+                if pk in affected:
+                    results.append({'id': pk, 'result': affected[pk]})
+                else:
+                    results.append({'id': pk, 'result': 'forbidden' if pk in existing else 'not_found'})
+
+        if affected:
+            self.finalize_action(action, affected)
+
+        requested = set(ids)
+        return Response({
+            'action': action,
+            'processed': sum(1 for pk in ids if pk in affected),
+            'truncated': truncated,
+            'results': results,
+            'cascaded': sorted(pk for pk in affected if pk not in requested),
+        }, status=status.HTTP_200_OK)
+
+
+class BulkPostModerationView(BulkModerationView):
+    """
+    View to publish, unpublish or delete many blog posts at once.
+    """
+    serializer_class = BulkPostModerationSerializer
+    queryset = BlogPost.objects.visible()
+    filter_lookups = {'author': 'author_id', 'category': 'category_id', 'status': 'status'}
+
+    def get_pending_queryset(self, action, queryset):
+        # Deleted posts already drop out of the visible() queryset
+        if action == 'publish':
+            return queryset.exclude(status='published')
+        if action == 'unpublish':
+            return queryset.exclude(status='draft')
+        return queryset
+
+    def apply_action(self, action, queryset):
+        post_ids = list(queryset.values_list('pk', flat=True))
+        category_ids = set(queryset.exclude(category__isnull=True).values_list('category_id', flat=True).distinct())
+        if action == 'delete':
+            queryset.update(deleted_at=timezone.now())
+            result = 'deleted'
+        else:
+            new_status = 'published' if action == 'publish' else 'draft'
+            queryset.update(status=new_status, updated_at=timezone.now())
+            result = action + 'ed'
+        # update() skips the post_save signal, so refresh the category aggregates here
+        if category_ids:
+            Category.refresh_post_stats(category_ids)
+        return dict.fromkeys(post_ids, result)
+
+    def finalize_action(self, action, affected):
+        post_ids = sorted(affected)
+        # One purge thread works through every deleted post in order, rather than one per chunk
+        if action == 'delete':
+            schedule_purge(post_ids)
+        transaction.on_commit(lambda: autocomplete_index.refresh_posts(post_ids))
+
+
+class BulkCommentModerationView(BulkModerationView):
+    """
+    View to delete many comments at once. Replies to deleted comments go with them.
+    """
+    serializer_class = BulkCommentModerationSerializer
+    queryset = Comment.objects.filter(post__deleted_at__isnull=True)
+    filter_lookups = {'post': 'post_id', 'author': 'author_id'}
+
+    def get_permitted_queryset(self):
+        queryset = super().get_permitted_queryset()
+        if self.request.user.is_staff:
+            return queryset
+        # Deleting a comment deletes its replies, so non-staff may only delete threads they wrote entirely
+        others_replies = Comment.objects.filter(
+            post_id=OuterRef('post_id'), path__startswith=OuterRef('path'),
+        ).exclude(author=self.request.user)
+        return queryset.exclude(Exists(others_replies))
+
+
 class RegisterView(APIView):
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -55,6 +56,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'blog.throttling.DatabaseLatencyMiddleware',
 ]
 
 ROOT_URLCONF = 'blogging_platform.urls'
@@ -101,9 +103,60 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.BrowsableAPIRenderer',
         'rest_framework.renderers.JSONRenderer',
     ),
+    'DEFAULT_THROTTLE_CLASSES': [
+        'blog.throttling.LoadSheddingThrottle',
+        'blog.throttling.ReadThrottle',
+        'blog.throttling.SearchThrottle',
+        'blog.throttling.WriteThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'autocomplete': '600/min',
+        'read': '300/min',
+        'search': '30/min',
+        'write': '20/min',
+    },
+}
+
+# Load shedding: expensive requests (writes, searches, deep pages) are rejected with 503
+# while the average database query time exceeds the threshold.
+LOAD_SHEDDING = {
+    'DB_LATENCY_THRESHOLD_MS': 250,
+    'MAX_CHEAP_PAGE': 5,
+    'RETRY_AFTER': 5,
+    'SAMPLE_TTL': 30,
 }
 
 
+# Deleted posts are hidden immediately and purged in chunks by a background thread.
+# SQLite allows a single writer, so a purge thread there would make concurrent request
+# writes fail with "database is locked"; on SQLite run `manage.py purge_deleted_posts`
+# (e.g. from cron) instead.
+BLOG_PURGE_IN_BACKGROUND = DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Throttle buckets and the autocomplete change log live here. Set REDIS_URL whenever more
+# than one worker process runs (e.g. under gunicorn); the local-memory fallback is
+# per-process, so each worker would keep its own buckets and never see the others' changes.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators